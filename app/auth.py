@@ -1,54 +1,173 @@
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Annotated
 
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
+from jose.constants import ALGORITHMS
+from jose.exceptions import ExpiredSignatureError
 from passlib.context import CryptContext
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.session import make_transient_to_detached
 
 from app import models
-from app.config import get_settings
+from app.config import settings
 from app.database import get_db
 from app.schemas import TokenData
 
-settings = get_settings()
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Argon2id for new hashes; bcrypt stays registered so existing hashes
+# keep verifying and are transparently upgraded on the next login.
+pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated=["bcrypt"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# HMAC key object built once; passing it to encode/decode lets jose skip
+# re-deriving the signing key from the raw secret on every call.
+_signing_key = jwk.construct(settings.secret_key, ALGORITHMS.HS256)
+
+# Default token lifetime, materialised once instead of per issued token.
+_DEFAULT_EXPIRES_DELTA = timedelta(minutes=settings.access_token_expire_minutes)
+
+# Decoded-payload cache so repeat requests with the same token skip the
+# HMAC verification + JSON parse. Entries never outlive the token itself:
+# the "exp" claim is re-checked on every hit.
+_jwt_cache: TTLCache = TTLCache(maxsize=10000, ttl=60)
+_jwt_cache_lock = threading.Lock()
+
+# Short-lived cache of User rows keyed by email, so every authenticated
+# request does not re-run the SELECT on the users table. Entries are
+# detached copies; hits are merged back into the caller's session.
+_user_cache: TTLCache = TTLCache(maxsize=5000, ttl=30)
+_user_cache_lock = threading.Lock()
+
+# Failed-login throttle: once the same (email, ip) pair has missed this
+# many times inside the window, login returns 429 without paying for a
+# password verification, capping CPU burn under brute-force attempts.
+_LOGIN_MAX_ATTEMPTS = 5
+_failed_logins: TTLCache = TTLCache(maxsize=10000, ttl=300)
+_failed_logins_lock = threading.Lock()
+
+
+def login_throttled(email: str, client_ip: str) -> bool:
+    """True when this (email, ip) pair has exhausted its login attempts."""
+    key = (email.lower(), client_ip)
+    with _failed_logins_lock:
+        return _failed_logins.get(key, 0) >= _LOGIN_MAX_ATTEMPTS
+
+
+def record_login_attempt(email: str, client_ip: str, success: bool) -> None:
+    key = (email.lower(), client_ip)
+    with _failed_logins_lock:
+        if success:
+            _failed_logins.pop(key, None)
+        else:
+            _failed_logins[key] = _failed_logins.get(key, 0) + 1
+
+
+def _detached_user_copy(user: models.User) -> models.User:
+    """Build a clean detached copy of a User row suitable for caching."""
+    clone = models.User()
+    for column in models.User.__table__.columns.keys():
+        setattr(clone, column, getattr(user, column))
+    make_transient_to_detached(clone)
+    return clone
+
+
+def _cache_user(user: models.User) -> None:
+    clone = _detached_user_copy(user)
+    with _user_cache_lock:
+        _user_cache[user.email] = clone
+        _user_cache[f"id:{user.id}"] = clone
+
+
+def invalidate_user(user: models.User) -> None:
+    """Drop a cached user after a mutation so the next request re-reads it."""
+    with _user_cache_lock:
+        _user_cache.pop(user.email, None)
+        _user_cache.pop(f"id:{user.id}", None)
+
+
+def invalidate_jwt(token: str) -> None:
+    """Evict a cached token payload (logout / revocation)."""
+    with _jwt_cache_lock:
+        _jwt_cache.pop(token, None)
+
+
+def _decode_token(token: str) -> dict:
+    """Decode and verify a JWT, caching the payload for repeat requests."""
+    with _jwt_cache_lock:
+        cached = _jwt_cache.get(token)
+    if cached is not None:
+        # time.time() is epoch UTC like the exp claim; a naive
+        # utcnow().timestamp() would be skewed by the local UTC offset.
+        if cached.get("exp", 0) <= time.time():
+            raise ExpiredSignatureError("Signature has expired.")
+        return cached
+    payload = jwt.decode(token, _signing_key, algorithms=["HS256"])
+    with _jwt_cache_lock:
+        _jwt_cache[token] = payload
+    return payload
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    # Bcrypt has a 72-byte limit, truncate if necessary (same as hashing)
-    password_bytes = plain_password.encode('utf-8')
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
-    return pwd_context.verify(password_bytes.decode('utf-8', errors='ignore'), hashed_password)
+    return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    # Bcrypt has a 72-byte limit, truncate if necessary
-    password_bytes = password.encode('utf-8')
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
-    return pwd_context.hash(password_bytes.decode('utf-8', errors='ignore'))
+    return pwd_context.hash(password)
 
 
 def create_access_token(subject: str, expires_delta: timedelta | None = None) -> str:
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.access_token_expire_minutes))
+    expire = datetime.utcnow() + (expires_delta or _DEFAULT_EXPIRES_DELTA)
     to_encode = {"sub": subject, "exp": expire}
-    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm="HS256")
+    encoded_jwt = jwt.encode(to_encode, _signing_key, algorithm="HS256")
     return encoded_jwt
 
 
 def get_user_by_email(db: Session, email: str) -> models.User | None:
-    return db.query(models.User).filter(models.User.email == email).first()
+    with _user_cache_lock:
+        cached = _user_cache.get(email)
+    if cached is not None:
+        return db.merge(cached, load=False)
+    user = db.scalars(
+        select(models.User).where(models.User.email == email)
+    ).first()
+    if user is not None:
+        _cache_user(user)
+    return user
+
+
+def get_user_by_id(db: Session, user_id: int) -> models.User | None:
+    with _user_cache_lock:
+        cached = _user_cache.get(f"id:{user_id}")
+    if cached is not None:
+        return db.merge(cached, load=False)
+    user = db.get(models.User, user_id)
+    if user is not None:
+        _cache_user(user)
+    return user
+
+
+def _resolve_subject(db: Session, sub: str) -> models.User | None:
+    """Resolve a token subject: user id (current tokens) or email (legacy)."""
+    try:
+        user_id = int(sub)
+    except ValueError:
+        return get_user_by_email(db, sub)
+    return get_user_by_id(db, user_id)
 
 
 def authenticate_user(db: Session, email: str, password: str) -> models.User | None:
     user = get_user_by_email(db, email)
     if not user or not verify_password(password, user.hashed_password):
         return None
+    if pwd_context.needs_update(user.hashed_password):
+        user.hashed_password = get_password_hash(password)
+        db.commit()
+        invalidate_user(user)
     return user
 
 
@@ -71,6 +190,12 @@ async def get_current_user(
     request: Request,
     db: Annotated[Session, Depends(get_db)],
 ) -> models.User:
+    # Memoize per request: when several dependencies in the chain resolve
+    # the user (e.g. admin endpoints), decode + lookup happens only once.
+    cached_user = getattr(request.state, "current_user", None)
+    if cached_user is not None:
+        return cached_user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -82,16 +207,17 @@ async def get_current_user(
         raise credentials_exception
     
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=["HS256"])
+        payload = _decode_token(token)
         email: str | None = payload.get("sub")
         token_data = TokenData(sub=email)
     except JWTError as exc:
         raise credentials_exception from exc
     if token_data.sub is None:
         raise credentials_exception
-    user = get_user_by_email(db, token_data.sub)
+    user = _resolve_subject(db, token_data.sub)
     if user is None:
         raise credentials_exception
+    request.state.current_user = user
     return user
 
 
@@ -100,20 +226,27 @@ async def get_optional_user(
     db: Annotated[Session, Depends(get_db)],
 ) -> models.User | None:
     """Optional user - returns None if not logged in (no exception)"""
+    cached_user = getattr(request.state, "current_user", None)
+    if cached_user is not None:
+        return cached_user
+
     token = await get_token_from_request(request)
     if not token:
         return None
     
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=["HS256"])
+        payload = _decode_token(token)
         email: str | None = payload.get("sub")
         token_data = TokenData(sub=email)
     except JWTError:
         return None
     if token_data.sub is None:
         return None
-    user = get_user_by_email(db, token_data.sub)
-    return user if user and user.is_active else None
+    user = _resolve_subject(db, token_data.sub)
+    if user is None or not user.is_active:
+        return None
+    request.state.current_user = user
+    return user
 
 
 async def get_current_active_user(
@@ -4,6 +4,7 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     app_name: str = "Mini Cloud Drive"
+    debug: bool = False
     database_url: str = "sqlite:///./cloud_drive.db"
     secret_key: str
     access_token_expire_minutes: int = 60
@@ -22,3 +23,8 @@ class Settings(BaseSettings):
 def get_settings() -> Settings:
     return Settings()
 
+
+# Resolved once at import; hot paths reference this constant instead of
+# paying a function call + cache lookup per use.
+settings = get_settings()
+
@@ -1,12 +1,15 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
 
-from app.config import get_settings
-
-settings = get_settings()
+from app.config import settings
 
 engine = create_engine(
     settings.database_url,
+    # Enough pooled connections for a multi-worker deployment; no
+    # pre-ping round trip per checkout.
+    pool_size=20,
+    max_overflow=40,
+    pool_pre_ping=False,
     connect_args={"check_same_thread": False}
     if settings.database_url.startswith("sqlite")
     else {},
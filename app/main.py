@@ -1,11 +1,16 @@
+import logging
 import os
+import sqlite3
+
 from fastapi import Depends, FastAPI, Request
-from fastapi.responses import HTMLResponse, Response
+from fastapi.responses import FileResponse, HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
 
 from app import models
 from app.auth import get_current_active_user, get_optional_user
+from app.config import settings
 from app.database import Base, engine
 from app.routers import admin, files, folders, users
 
@@ -17,27 +22,55 @@ app.include_router(folders.router)
 app.include_router(admin.router)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
-templates = Jinja2Templates(directory="templates")
+# Only stat template files for changes in debug mode; cache compiled
+# template bytecode so worker restarts skip recompilation.
+templates = Jinja2Templates(
+    directory="templates",
+    auto_reload=settings.debug,
+    bytecode_cache=FileSystemBytecodeCache(),
+)
+
+
+# Bump whenever the inline migration below gains a new step. Databases
+# already at this version skip the whole block on startup.
+_SCHEMA_VERSION = 6
+
+# In-process sentinel so dev auto-reload / repeated startup events don't
+# re-open the database and re-probe the schema.
+_migration_ran = False
 
 
 @app.on_event("startup")
 def on_startup() -> None:
+    global _migration_ran
+
     # Create all tables (for new installations)
     Base.metadata.create_all(bind=engine)
-    
+
+    if _migration_ran:
+        return
+
     # Run migrations for existing databases
     try:
-        import sqlite3
-        from app.config import get_settings
-        settings = get_settings()
         db_url = settings.database_url
-        
+
         if db_url.startswith("sqlite:///"):
             db_path = db_url.replace("sqlite:///", "")
             if db_path and os.path.exists(db_path):
                 conn = sqlite3.connect(db_path)
                 cursor = conn.cursor()
-                
+
+                # Skip everything when the schema is already current
+                cursor.execute(
+                    "CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"
+                )
+                row = cursor.execute("SELECT version FROM schema_version").fetchone()
+                current_version = row[0] if row else 0
+                if current_version >= _SCHEMA_VERSION:
+                    conn.close()
+                    _migration_ran = True
+                    return
+
                 # Check existing columns
                 cursor.execute("PRAGMA table_info(files)")
                 existing_columns = [row[1] for row in cursor.fetchall()]
@@ -49,6 +82,22 @@ def on_startup() -> None:
                     cursor.execute("ALTER TABLE files ADD COLUMN is_trashed BOOLEAN DEFAULT 0")
                 if 'trashed_at' not in existing_columns:
                     cursor.execute("ALTER TABLE files ADD COLUMN trashed_at DATETIME")
+                if 'category' not in existing_columns:
+                    cursor.execute("ALTER TABLE files ADD COLUMN category VARCHAR NOT NULL DEFAULT 'other'")
+                    # Backfill from content_type so type filters work for
+                    # files uploaded before the column existed
+                    cursor.execute("""
+                        UPDATE files SET category = CASE
+                            WHEN content_type LIKE 'image/%' THEN 'image'
+                            WHEN content_type LIKE 'video/%' THEN 'video'
+                            WHEN content_type LIKE 'audio/%' THEN 'audio'
+                            WHEN content_type LIKE 'text/%' THEN 'text'
+                            WHEN content_type LIKE 'application/pdf%'
+                                OR content_type LIKE 'application/msword%'
+                                OR content_type LIKE 'application/vnd.openxmlformats%' THEN 'document'
+                            ELSE 'other'
+                        END
+                    """)
                 
                 # Create new tables if they don't exist
                 cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='folders'")
@@ -69,14 +118,15 @@ def on_startup() -> None:
                 if not cursor.fetchone():
                     cursor.execute("""
                         CREATE TABLE favorites (
-                            id INTEGER NOT NULL PRIMARY KEY,
-                            file_id INTEGER NOT NULL,
                             user_id INTEGER NOT NULL,
+                            file_id INTEGER NOT NULL,
                             created_at DATETIME,
+                            PRIMARY KEY (user_id, file_id),
                             FOREIGN KEY(file_id) REFERENCES files (id),
                             FOREIGN KEY(user_id) REFERENCES users (id)
-                        )
+                        ) WITHOUT ROWID
                     """)
+                    cursor.execute("CREATE INDEX IF NOT EXISTS idx_favorites_file ON favorites(file_id)")
                 
                 cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='activity_logs'")
                 if not cursor.fetchone():
@@ -93,11 +143,31 @@ def on_startup() -> None:
                         )
                     """)
                 
+                # Indexes for pre-existing tables (create_all only builds
+                # them when it creates the table itself)
+                cursor.execute("CREATE INDEX IF NOT EXISTS ix_files_active_owner_uploaded ON files (owner_id, uploaded_at) WHERE is_trashed = 0")
+                cursor.execute("CREATE INDEX IF NOT EXISTS ix_files_trashed_owner_uploaded ON files (owner_id, uploaded_at) WHERE is_trashed = 1")
+                cursor.execute("CREATE INDEX IF NOT EXISTS ix_files_owner_folder_trashed ON files (owner_id, folder_id, is_trashed)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS ix_files_owner_category_trashed ON files (owner_id, category, is_trashed, uploaded_at)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS ix_share_links_expires_at ON share_links (expires_at)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_activity_user_time ON activity_logs (user_id, created_at DESC)")
+                # Superseded by the composites above (they share the same
+                # leading columns), so drop them if a v2 database has them.
+                cursor.execute("DROP INDEX IF EXISTS ix_files_owner_uploaded_at")
+                cursor.execute("DROP INDEX IF EXISTS ix_files_owner_trashed")
+                cursor.execute("DROP INDEX IF EXISTS ix_files_owner_trashed_uploaded")
+
+                # Record the version so future startups short-circuit
+                if row:
+                    cursor.execute("UPDATE schema_version SET version = ?", (_SCHEMA_VERSION,))
+                else:
+                    cursor.execute("INSERT INTO schema_version (version) VALUES (?)", (_SCHEMA_VERSION,))
+
                 conn.commit()
                 conn.close()
+        _migration_ran = True
     except Exception as e:
         # If migration fails, log but don't crash
-        import logging
         logging.warning(f"Database migration warning: {e}")
 
 
@@ -157,9 +227,7 @@ def admin_panel(request: Request):
 
 @app.get("/favicon.ico")
 def favicon():
-    # Return a simple 1x1 transparent PNG to avoid 404 errors
-    return Response(
-        content=b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89\x00\x00\x00\nIDATx\x9cc\x00\x01\x00\x00\x05\x00\x01\r\n-\xdb\x00\x00\x00\x00IEND\xaeB`\x82',
-        media_type="image/png"
-    )
+    # Serve the static file for browsers that request the default path;
+    # StaticFiles adds ETag/Last-Modified so they revalidate cheaply.
+    return FileResponse("static/favicon.ico", media_type="image/png")
 
@@ -1,9 +1,30 @@
 from datetime import datetime
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, BigInteger
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, BigInteger, text
 from sqlalchemy.orm import relationship
 
 from app.database import Base
 
+# Document MIME types that don't share a common prefix.
+_DOCUMENT_CONTENT_TYPES = (
+    "application/pdf",
+    "application/msword",
+    "application/vnd.openxmlformats",
+)
+
+
+def categorize_content_type(content_type: str) -> str:
+    """Map a MIME type onto the coarse category stored per file.
+
+    Stored at upload time so type filters are a single equality check
+    instead of a chain of LIKE predicates over content_type.
+    """
+    prefix = content_type.split("/", 1)[0]
+    if prefix in ("image", "video", "audio", "text"):
+        return prefix
+    if content_type.startswith(_DOCUMENT_CONTENT_TYPES):
+        return "document"
+    return "other"
+
 
 class User(Base):
     __tablename__ = "users"
@@ -39,10 +60,47 @@ class Folder(Base):
 
 class FileAsset(Base):
     __tablename__ = "files"
+    __table_args__ = (
+        # Partial indexes per trash state: the default listing scans the
+        # active index directly (no is_trashed column to carry or filter),
+        # and the trash view gets its own tiny index over the few trashed
+        # rows.
+        Index(
+            "ix_files_active_owner_uploaded",
+            "owner_id",
+            "uploaded_at",
+            sqlite_where=text("is_trashed = 0"),
+            postgresql_where=text("is_trashed = false"),
+        ),
+        Index(
+            "ix_files_trashed_owner_uploaded",
+            "owner_id",
+            "uploaded_at",
+            sqlite_where=text("is_trashed = 1"),
+            postgresql_where=text("is_trashed = true"),
+        ),
+        # Folder-scoped listings filter on folder_id as well.
+        Index("ix_files_owner_folder_trashed", "owner_id", "folder_id", "is_trashed"),
+        # Type-filtered listings: equality on category, then the usual
+        # trash filter and date sort.
+        Index("ix_files_owner_category_trashed", "owner_id", "category", "is_trashed", "uploaded_at"),
+        # Trigram GIN index so %substring% ILIKE filename searches hit an
+        # index on PostgreSQL (requires the pg_trgm extension). SQLite
+        # ignores the dialect options and builds a plain B-tree.
+        Index(
+            "ix_files_filename_trgm",
+            "filename",
+            postgresql_using="gin",
+            postgresql_ops={"filename": "gin_trgm_ops"},
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String, nullable=False)
     content_type = Column(String, nullable=False)
+    # Coarse bucket derived from content_type (image/video/audio/document/
+    # text/other); see categorize_content_type above.
+    category = Column(String, nullable=False, default="other")
     size = Column(BigInteger, nullable=False)
     s3_key = Column(String, nullable=False, unique=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -64,7 +122,7 @@ class ShareLink(Base):
     id = Column(Integer, primary_key=True, index=True)
     token = Column(String, unique=True, nullable=False, index=True)
     file_id = Column(Integer, ForeignKey("files.id"), nullable=False)
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
     created_by_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
     file = relationship("FileAsset", back_populates="share_links")
@@ -72,10 +130,17 @@ class ShareLink(Base):
 
 class Favorite(Base):
     __tablename__ = "favorites"
-
-    id = Column(Integer, primary_key=True, index=True)
-    file_id = Column(Integer, ForeignKey("files.id"), nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    __table_args__ = (
+        # The composite PK serves "user X's favorites" directly; the
+        # extra index covers the join from the files side. WITHOUT ROWID
+        # stores rows in the PK B-tree itself, skipping the rowid
+        # indirection on every lookup (SQLite only; ignored elsewhere).
+        Index("idx_favorites_file", "file_id"),
+        {"sqlite_with_rowid": False},
+    )
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    file_id = Column(Integer, ForeignKey("files.id"), primary_key=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     file = relationship("FileAsset", back_populates="favorites")
@@ -84,6 +149,10 @@ class Favorite(Base):
 
 class ActivityLog(Base):
     __tablename__ = "activity_logs"
+    __table_args__ = (
+        # "Recent activity for user X" straight off the index.
+        Index("idx_activity_user_time", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
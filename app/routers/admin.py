@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app import models
@@ -23,5 +24,7 @@ def list_users(
     db: Session = Depends(get_db),
     _: models.User = Depends(get_current_admin),
 ) -> list[models.User]:
-    return db.query(models.User).order_by(models.User.created_at.desc()).all()
+    return db.scalars(
+        select(models.User).order_by(models.User.created_at.desc())
+    ).all()
 
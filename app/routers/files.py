@@ -1,40 +1,114 @@
+import base64
+import os
 import secrets
+import threading
 import zipfile
 import io
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Annotated, Optional
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile, status, Query
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, load_only, raiseload
+from sqlalchemy import delete, and_, func, select, update
 
 from app import models
-from app.auth import get_current_active_user, get_current_user
-from app.database import get_db
+from app.auth import get_current_active_user, get_current_user, invalidate_user
+from app.database import SessionLocal, get_db
 from app.schemas import FileRead, ShareLinkRead, FolderCreate, FolderRead, ActivityLogRead
-from app.services.storage import S3StorageService
+from app.services.stats import invalidate_summary
+from app.services.storage import S3StorageService, StorageError
 
 
+@lru_cache
 def get_storage_service() -> S3StorageService:
+    # One service (and one boto3 client with its TLS connection pool) for
+    # the whole process instead of a fresh session per request.
     return S3StorageService()
 
 
 def log_activity(
-    db: Session,
     user_id: int,
     action: str,
     file_id: Optional[int] = None,
     details: Optional[str] = None,
 ):
-    """Helper function to log user activities"""
-    activity = models.ActivityLog(
-        user_id=user_id,
-        action=action,
-        file_id=file_id,
-        details=details,
-    )
-    db.add(activity)
-    db.commit()
+    """Write an activity row; runs as a background task after the response.
+
+    Uses its own short-lived session so the request path doesn't pay a
+    second commit (and its fsync) for every user action.
+    """
+    db = SessionLocal()
+    try:
+        activity = models.ActivityLog(
+            user_id=user_id,
+            action=action,
+            file_id=file_id,
+            details=details,
+        )
+        db.add(activity)
+        db.commit()
+    finally:
+        db.close()
+
+
+# Formats with internal compression: deflating them again burns CPU for
+# near-zero size gain, so ZIP archives store them as-is.
+_PRECOMPRESSED_TYPES = {
+    "application/pdf",
+    "application/zip",
+    "application/gzip",
+    "application/x-7z-compressed",
+    "application/x-rar-compressed",
+}
+
+
+def _zip_compress_type(content_type: str) -> int:
+    if content_type.split("/", 1)[0] in ("image", "video", "audio"):
+        return zipfile.ZIP_STORED
+    if content_type in _PRECOMPRESSED_TYPES:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+# Share tokens are drawn from a pregenerated batch: one urandom read
+# refills 64 tokens, amortising the syscall under bursts of sharing.
+_TOKEN_BYTES = 16
+_TOKEN_BATCH = 64
+_share_tokens: deque = deque()
+_share_tokens_lock = threading.Lock()
+
+
+def _next_share_token() -> str:
+    with _share_tokens_lock:
+        if not _share_tokens:
+            blob = os.urandom(_TOKEN_BATCH * _TOKEN_BYTES)
+            _share_tokens.extend(
+                base64.urlsafe_b64encode(blob[i:i + _TOKEN_BYTES]).rstrip(b"=").decode()
+                for i in range(0, len(blob), _TOKEN_BYTES)
+            )
+        return _share_tokens.popleft()
+
+
+class _ZipStreamBuffer(io.RawIOBase):
+    """File-like sink that hands written chunks to a streaming generator."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> list[bytes]:
+        chunks, self._chunks = self._chunks, []
+        return chunks
 
 
 router = APIRouter(prefix="/files", tags=["Files"])
@@ -48,65 +122,93 @@ def list_my_files(
     favorite_only: bool = Query(False, description="Show only favorites"),
     trashed: bool = Query(False, description="Show trashed files"),
     sort_by: str = Query("date", description="Sort by: date, name, size"),
+    include_urls: bool = Query(False, description="Include presigned download URLs"),
+    limit: int = Query(100, ge=1, le=500, description="Maximum number of files to return"),
+    cursor: Optional[datetime] = Query(None, description="Return files uploaded before this timestamp (date sort only)"),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
+    storage: S3StorageService = Depends(get_storage_service),
 ) -> list[models.FileAsset]:
     """List files with search, filtering, and sorting"""
-    query = db.query(models.FileAsset).filter(models.FileAsset.owner_id == current_user.id)
-    
+    # LEFT JOIN against the caller's favorites so the DB labels each row
+    # is_favorite directly - no second query materialising every
+    # favorite id into a Python set.
+    query = (
+        select(
+            models.FileAsset,
+            models.Favorite.file_id.isnot(None).label("is_favorite"),
+        )
+        .outerjoin(
+            models.Favorite,
+            and_(
+                models.Favorite.file_id == models.FileAsset.id,
+                models.Favorite.user_id == current_user.id,
+            ),
+        )
+        .where(models.FileAsset.owner_id == current_user.id)
+    )
+
+    # Hydrate only the columns the response uses; s3_key is needed just
+    # when presigning URLs.
+    columns = [
+        models.FileAsset.id,
+        models.FileAsset.filename,
+        models.FileAsset.size,
+        models.FileAsset.content_type,
+        models.FileAsset.uploaded_at,
+        models.FileAsset.download_count,
+        models.FileAsset.folder_id,
+        models.FileAsset.is_trashed,
+    ]
+    if include_urls:
+        columns.append(models.FileAsset.s3_key)
+    # raiseload turns any lazy relationship access below into an error
+    # instead of a silent per-row SELECT.
+    query = query.options(load_only(*columns), raiseload("*"))
+
     # Filter by trash status
     if trashed:
-        query = query.filter(models.FileAsset.is_trashed == True)
+        query = query.where(models.FileAsset.is_trashed == True)
     else:
-        query = query.filter(models.FileAsset.is_trashed == False)
-    
+        query = query.where(models.FileAsset.is_trashed == False)
+
     # Search by filename
     if search:
-        query = query.filter(models.FileAsset.filename.ilike(f"%{search}%"))
+        query = query.where(models.FileAsset.filename.ilike(f"%{search}%"))
     
-    # Filter by file type
+    # Filter by file type: category is precomputed at upload time, so
+    # this is a single indexed equality instead of a chain of LIKEs
+    # over content_type.
     if file_type:
-        type_mapping = {
-            "image": ["image/"],
-            "video": ["video/"],
-            "audio": ["audio/"],
-            "document": ["application/pdf", "application/msword", "application/vnd.openxmlformats"],
-            "text": ["text/"],
-        }
-        if file_type in type_mapping:
-            filters = [models.FileAsset.content_type.like(f"{t}%") for t in type_mapping[file_type]]
-            query = query.filter(or_(*filters))
-    
+        query = query.where(models.FileAsset.category == file_type)
+
     # Filter by folder
     if folder_id is not None:
-        query = query.filter(models.FileAsset.folder_id == folder_id)
-    
-    # Filter by favorites
+        query = query.where(models.FileAsset.folder_id == folder_id)
+
+    # Filter by favorites: the LEFT JOIN above already pairs each file
+    # with the caller's favorite row, so this is a plain semi-join
+    # predicate rather than a subquery-in-subquery.
     if favorite_only:
-        favorite_file_ids = db.query(models.Favorite.file_id).filter(
-            models.Favorite.user_id == current_user.id
-        ).subquery()
-        query = query.filter(models.FileAsset.id.in_(db.query(favorite_file_ids)))
+        query = query.where(models.Favorite.file_id.isnot(None))
     
-    # Sorting
+    # Sorting. The default date order supports keyset pagination: pass
+    # the uploaded_at of the last row back as `cursor` for the next page,
+    # so deep pages stay an index range scan instead of a growing OFFSET.
     if sort_by == "name":
         query = query.order_by(models.FileAsset.filename.asc())
     elif sort_by == "size":
         query = query.order_by(models.FileAsset.size.desc())
     else:  # date (default)
+        if cursor is not None:
+            query = query.where(models.FileAsset.uploaded_at < cursor)
         query = query.order_by(models.FileAsset.uploaded_at.desc())
-    
-    files = query.all()
-    
-    # Add favorite status to each file
-    favorite_ids = {
-        f.file_id for f in db.query(models.Favorite).filter(
-            models.Favorite.user_id == current_user.id
-        ).all()
-    }
-    
+
+    rows = db.execute(query.limit(limit)).all()
+
     result = []
-    for file in files:
+    to_presign = []
+    for file, is_favorite in rows:
         file_dict = {
             "id": file.id,
             "filename": file.filename,
@@ -116,15 +218,25 @@ def list_my_files(
             "download_count": file.download_count,
             "folder_id": file.folder_id,
             "is_trashed": file.is_trashed,
-            "is_favorite": file.id in favorite_ids,
+            "is_favorite": bool(is_favorite),
         }
+        if include_urls and not file.is_trashed:
+            to_presign.append((file_dict, file.s3_key))
         result.append(file_dict)
-    
+
+    if to_presign:
+        # Batched so large pages fan the signing work across threads;
+        # the frontend skips a URL request per file it wants to render.
+        urls = storage.presigned_download_many([key for _, key in to_presign])
+        for (file_dict, _), url in zip(to_presign, urls):
+            file_dict["url"] = url
+
     return result
 
 
 @router.post("/upload", response_model=FileRead, status_code=status.HTTP_201_CREATED)
 async def upload_file(
+    background_tasks: BackgroundTasks,
     upload: Annotated[UploadFile, File(description="Binary file")],
     folder_id: Optional[int] = None,
     db: Session = Depends(get_db),
@@ -138,42 +250,57 @@ async def upload_file(
         if not folder or folder.owner_id != current_user.id:
             raise HTTPException(status_code=404, detail="Folder not found")
     
-    upload.file.seek(0, 2)
-    size = upload.file.tell()
-    upload.file.seek(0)
-    s3_key = storage.upload(file_obj=upload.file, content_type=upload.content_type or "application/octet-stream")
+    # Size comes back from the transfer itself - no seek-to-end pass that
+    # would read disk-spooled uploads twice.
+    content_type = upload.content_type or "application/octet-stream"
+    s3_key, size = storage.upload(file_obj=upload.file, content_type=content_type)
     record = models.FileAsset(
         filename=upload.filename,
-        content_type=upload.content_type or "application/octet-stream",
+        content_type=content_type,
+        category=models.categorize_content_type(content_type),
         size=size,
         owner_id=current_user.id,
         s3_key=s3_key,
         folder_id=folder_id,
     )
-    current_user.total_bytes += size
-    current_user.file_count += 1
+    # Counters via relative SQL arithmetic (like bulk_delete): the cached
+    # user row may be up to 30s stale, and another worker's committed
+    # increment must not be overwritten by stale-base-plus-delta. The
+    # flush assigns record.id and the defaults, letting us build the
+    # response without a post-commit refresh SELECT.
+    db.execute(
+        update(models.User)
+        .where(models.User.id == current_user.id)
+        .values(
+            total_bytes=models.User.total_bytes + size,
+            file_count=models.User.file_count + 1,
+        )
+    )
     db.add(record)
-    db.add(current_user)
-    db.commit()
-    db.refresh(record)
-    
-    log_activity(db, current_user.id, "upload", record.id, f"Uploaded {upload.filename}")
-    
-    return {
+    db.flush()
+    result = {
         "id": record.id,
         "filename": record.filename,
         "size": record.size,
         "content_type": record.content_type,
         "uploaded_at": record.uploaded_at,
-        "download_count": record.download_count,
+        "download_count": record.download_count or 0,
         "folder_id": record.folder_id,
-        "is_trashed": record.is_trashed,
+        "is_trashed": False,
         "is_favorite": False,
     }
+    db.commit()
+    invalidate_user(current_user)
+    invalidate_summary()
+
+    background_tasks.add_task(log_activity, current_user.id, "upload", result["id"], f"Uploaded {upload.filename}")
+
+    return result
 
 
 @router.get("/{file_id}/download")
 def generate_download_link(
+    background_tasks: BackgroundTasks,
     file_id: int,
     expires_in: int = 600,
     db: Session = Depends(get_db),
@@ -181,19 +308,29 @@ def generate_download_link(
     storage: S3StorageService = Depends(get_storage_service),
 ) -> dict:
     """Generate a presigned download URL"""
-    file_obj = db.get(models.FileAsset, file_id)
-    if not file_obj or (file_obj.owner_id != current_user.id and not current_user.is_admin):
+    # Single atomic UPDATE ... RETURNING: bumps the counter, checks
+    # ownership and trash state, and fetches the columns we need in one
+    # round trip, with no read-modify-write race on download_count.
+    stmt = (
+        update(models.FileAsset)
+        .where(
+            models.FileAsset.id == file_id,
+            models.FileAsset.is_trashed == False,
+        )
+        .values(download_count=models.FileAsset.download_count + 1)
+        .returning(models.FileAsset.s3_key, models.FileAsset.filename)
+    )
+    if not current_user.is_admin:
+        stmt = stmt.where(models.FileAsset.owner_id == current_user.id)
+    row = db.execute(stmt).first()
+    if row is None:
+        db.rollback()
         raise HTTPException(status_code=404, detail="File not found")
-    if file_obj.is_trashed:
-        raise HTTPException(status_code=404, detail="File is in trash")
-    
-    file_obj.download_count += 1
-    db.add(file_obj)
     db.commit()
-    
-    log_activity(db, current_user.id, "download", file_id, f"Downloaded {file_obj.filename}")
-    
-    url = storage.presigned_download(file_obj.s3_key, expires_in=expires_in)
+
+    background_tasks.add_task(log_activity, current_user.id, "download", file_id, f"Downloaded {row.filename}")
+
+    url = storage.presigned_download(row.s3_key, expires_in=expires_in)
     return {"url": url}
 
 
@@ -223,6 +360,7 @@ def preview_file(
 
 @router.post("/{file_id}/share", response_model=ShareLinkRead)
 def create_share_link(
+    background_tasks: BackgroundTasks,
     file_id: int,
     minutes: int = 30,
     db: Session = Depends(get_db),
@@ -235,24 +373,32 @@ def create_share_link(
     if file_obj.is_trashed:
         raise HTTPException(status_code=404, detail="File is in trash")
     
-    token = secrets.token_urlsafe(16)
     share = models.ShareLink(
-        token=token,
+        token=_next_share_token(),
         file_id=file_obj.id,
         expires_at=datetime.utcnow() + timedelta(minutes=minutes),
         created_by_id=current_user.id,
     )
     db.add(share)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # A 128-bit token collision is vanishingly unlikely, but the
+        # UNIQUE index turns it into a clean retry rather than bad data.
+        db.rollback()
+        share.token = secrets.token_urlsafe(_TOKEN_BYTES)
+        db.add(share)
+        db.commit()
     db.refresh(share)
     
-    log_activity(db, current_user.id, "share", file_id, f"Created share link for {file_obj.filename}")
+    background_tasks.add_task(log_activity, current_user.id, "share", file_id, f"Created share link for {file_obj.filename}")
     
     return share
 
 
 @router.delete("/{file_id}")
 def delete_file(
+    background_tasks: BackgroundTasks,
     file_id: int,
     permanent: bool = Query(False, description="Permanently delete (skip trash)"),
     db: Session = Depends(get_db),
@@ -271,27 +417,37 @@ def delete_file(
         except Exception:
             pass
         
-        current_user.total_bytes -= file_obj.size
-        current_user.file_count -= 1
+        # Relative arithmetic for the same reason as upload_file: never
+        # write an absolute counter computed from a possibly stale base.
+        db.execute(
+            update(models.User)
+            .where(models.User.id == current_user.id)
+            .values(
+                total_bytes=models.User.total_bytes - file_obj.size,
+                file_count=models.User.file_count - 1,
+            )
+        )
         db.delete(file_obj)
-        db.add(current_user)
         db.commit()
-        
-        log_activity(db, current_user.id, "delete_permanent", file_id, f"Permanently deleted {file_obj.filename}")
+        invalidate_user(current_user)
+        invalidate_summary()
+
+        background_tasks.add_task(log_activity, current_user.id, "delete_permanent", file_id, f"Permanently deleted {file_obj.filename}")
         return {"message": "File permanently deleted"}
     else:
-        # Move to trash
+        # Move to trash; the DB stamps the timestamp server-side
         file_obj.is_trashed = True
-        file_obj.trashed_at = datetime.utcnow()
+        file_obj.trashed_at = func.now()
         db.add(file_obj)
         db.commit()
         
-        log_activity(db, current_user.id, "delete", file_id, f"Moved {file_obj.filename} to trash")
+        background_tasks.add_task(log_activity, current_user.id, "delete", file_id, f"Moved {file_obj.filename} to trash")
         return {"message": "File moved to trash"}
 
 
 @router.post("/{file_id}/restore")
 def restore_file(
+    background_tasks: BackgroundTasks,
     file_id: int,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
@@ -308,12 +464,13 @@ def restore_file(
     db.add(file_obj)
     db.commit()
     
-    log_activity(db, current_user.id, "restore", file_id, f"Restored {file_obj.filename} from trash")
+    background_tasks.add_task(log_activity, current_user.id, "restore", file_id, f"Restored {file_obj.filename} from trash")
     return {"message": "File restored"}
 
 
 @router.post("/{file_id}/favorite")
 def toggle_favorite(
+    background_tasks: BackgroundTasks,
     file_id: int,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
@@ -323,9 +480,11 @@ def toggle_favorite(
     if not file_obj or (file_obj.owner_id != current_user.id and not current_user.is_admin):
         raise HTTPException(status_code=404, detail="File not found")
     
-    favorite = db.query(models.Favorite).filter(
-        models.Favorite.file_id == file_id,
-        models.Favorite.user_id == current_user.id
+    favorite = db.scalars(
+        select(models.Favorite).where(
+            models.Favorite.file_id == file_id,
+            models.Favorite.user_id == current_user.id,
+        )
     ).first()
     
     is_favorite = False
@@ -339,13 +498,14 @@ def toggle_favorite(
         is_favorite = True
     
     db.commit()
-    log_activity(db, current_user.id, action, file_id, f"{action.capitalize()} {file_obj.filename}")
+    background_tasks.add_task(log_activity, current_user.id, action, file_id, f"{action.capitalize()} {file_obj.filename}")
     
     return {"message": f"File {action}", "is_favorite": is_favorite}
 
 
 @router.post("/{file_id}/move")
 def move_file(
+    background_tasks: BackgroundTasks,
     file_id: int,
     folder_id: Optional[int] = None,
     db: Session = Depends(get_db),
@@ -366,12 +526,13 @@ def move_file(
     db.add(file_obj)
     db.commit()
     
-    log_activity(db, current_user.id, "move", file_id, f"Moved {file_obj.filename} to folder {folder_id or 'root'}")
+    background_tasks.add_task(log_activity, current_user.id, "move", file_id, f"Moved {file_obj.filename} to folder {folder_id or 'root'}")
     return {"message": "File moved", "folder_id": folder_id}
 
 
 @router.post("/bulk/delete")
 def bulk_delete(
+    background_tasks: BackgroundTasks,
     file_ids: list[int],
     permanent: bool = False,
     db: Session = Depends(get_db),
@@ -379,68 +540,124 @@ def bulk_delete(
     storage: S3StorageService = Depends(get_storage_service),
 ) -> dict:
     """Bulk delete files"""
-    files = db.query(models.FileAsset).filter(
-        models.FileAsset.id.in_(file_ids),
-        models.FileAsset.owner_id == current_user.id
+    # Set-based instead of row-at-a-time: one slim SELECT to partition
+    # the batch, then a single DELETE, a single trash UPDATE, and a
+    # single arithmetic UPDATE on the owner's counters.
+    files = db.execute(
+        select(
+            models.FileAsset.id,
+            models.FileAsset.s3_key,
+            models.FileAsset.size,
+            models.FileAsset.is_trashed,
+        ).where(
+            models.FileAsset.id.in_(file_ids),
+            models.FileAsset.owner_id == current_user.id,
+        )
     ).all()
-    
-    deleted_count = 0
-    for file_obj in files:
-        if permanent or file_obj.is_trashed:
-            try:
-                storage.delete(file_obj.s3_key)
-            except Exception:
-                pass
-            current_user.total_bytes -= file_obj.size
-            current_user.file_count -= 1
-            db.delete(file_obj)
-            deleted_count += 1
-        else:
-            file_obj.is_trashed = True
-            file_obj.trashed_at = datetime.utcnow()
-            db.add(file_obj)
-            deleted_count += 1
-    
-    db.add(current_user)
+
+    purge = [row for row in files if permanent or row.is_trashed]
+    trash_ids = [row.id for row in files if not (permanent or row.is_trashed)]
+
+    if purge:
+        # One multi-object DELETE per 1000 keys instead of an HTTP round
+        # trip per file.
+        try:
+            storage.delete_many([row.s3_key for row in purge])
+        except Exception:
+            pass
+        db.execute(
+            delete(models.FileAsset).where(
+                models.FileAsset.id.in_([row.id for row in purge])
+            )
+        )
+        db.execute(
+            update(models.User)
+            .where(models.User.id == current_user.id)
+            .values(
+                total_bytes=models.User.total_bytes - sum(row.size for row in purge),
+                file_count=models.User.file_count - len(purge),
+            )
+        )
+    if trash_ids:
+        db.execute(
+            update(models.FileAsset)
+            .where(models.FileAsset.id.in_(trash_ids))
+            .values(is_trashed=True, trashed_at=func.now())
+        )
     db.commit()
-    
-    log_activity(db, current_user.id, "bulk_delete", None, f"Bulk deleted {deleted_count} files")
+    invalidate_user(current_user)
+    if purge:
+        invalidate_summary()
+
+    deleted_count = len(files)
+    background_tasks.add_task(log_activity, current_user.id, "bulk_delete", None, f"Bulk deleted {deleted_count} files")
     return {"message": f"{deleted_count} files processed", "count": deleted_count}
 
 
 @router.post("/bulk/download")
 def bulk_download(
+    background_tasks: BackgroundTasks,
     file_ids: list[int],
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
     storage: S3StorageService = Depends(get_storage_service),
 ):
     """Download multiple files as ZIP"""
-    files = db.query(models.FileAsset).filter(
-        models.FileAsset.id.in_(file_ids),
-        models.FileAsset.owner_id == current_user.id,
-        models.FileAsset.is_trashed == False
+    files = db.scalars(
+        select(models.FileAsset).where(
+            models.FileAsset.id.in_(file_ids),
+            models.FileAsset.owner_id == current_user.id,
+            models.FileAsset.is_trashed == False,
+        )
     ).all()
     
     if not files:
         raise HTTPException(status_code=404, detail="No files found")
-    
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for file_obj in files:
-            try:
-                # Get file from S3
-                file_data = storage.download(file_obj.s3_key)
-                zip_file.writestr(file_obj.filename, file_data)
-            except Exception as e:
-                continue
-    
-    zip_buffer.seek(0)
-    
-    log_activity(db, current_user.id, "bulk_download", None, f"Downloaded {len(files)} files as ZIP")
-    
+
+    # Capture plain tuples now: the generator below runs after the
+    # response starts, when the ORM objects may already be expired.
+    entries = [
+        (file_obj.filename, file_obj.s3_key, _zip_compress_type(file_obj.content_type))
+        for file_obj in files
+    ]
+
+    background_tasks.add_task(log_activity, current_user.id, "bulk_download", None, f"Downloaded {len(files)} files as ZIP")
+
+    def zip_stream():
+        # Fan the S3 GETs out over a thread pool (boto3 clients are
+        # thread-safe for reads) while writing results into the archive
+        # in submission order. The sliding window keeps at most
+        # max_workers objects buffered, so wall time approaches the
+        # slowest fetch per batch instead of the sum of all fetches.
+        max_workers = 16
+        buffer = _ZipStreamBuffer()
+        with ThreadPoolExecutor(max_workers=max_workers) as pool, \
+                zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            remaining = iter(entries)
+            pending: deque = deque()
+            for entry in remaining:
+                pending.append((entry, pool.submit(storage.download, entry[1])))
+                if len(pending) >= max_workers:
+                    break
+            while pending:
+                (filename, s3_key, compress_type), future = pending.popleft()
+                refill = next(remaining, None)
+                if refill is not None:
+                    pending.append((refill, pool.submit(storage.download, refill[1])))
+                try:
+                    file_data = future.result()
+                except StorageError:
+                    # Skip objects that went missing; keep the archive
+                    # streaming for the rest.
+                    continue
+                # Media and other precompressed formats go in STORED so
+                # the archive stays network-bound instead of deflate-bound.
+                zip_file.writestr(filename, file_data, compress_type=compress_type)
+                yield from buffer.drain()
+        yield from buffer.drain()
+
     return StreamingResponse(
-        zip_buffer,
+        zip_stream(),
         media_type="application/zip",
         headers={"Content-Disposition": "attachment; filename=files.zip"}
     )
@@ -448,6 +665,7 @@ def bulk_download(
 
 @router.post("/bulk/move")
 def bulk_move(
+    background_tasks: BackgroundTasks,
     file_ids: list[int],
     folder_id: Optional[int] = None,
     db: Session = Depends(get_db),
@@ -459,33 +677,39 @@ def bulk_move(
         if not folder or folder.owner_id != current_user.id:
             raise HTTPException(status_code=404, detail="Folder not found")
     
-    files = db.query(models.FileAsset).filter(
-        models.FileAsset.id.in_(file_ids),
-        models.FileAsset.owner_id == current_user.id
+    files = db.scalars(
+        select(models.FileAsset).where(
+            models.FileAsset.id.in_(file_ids),
+            models.FileAsset.owner_id == current_user.id,
+        )
     ).all()
-    
+
     for file_obj in files:
         file_obj.folder_id = folder_id
         db.add(file_obj)
     
     db.commit()
     
-    log_activity(db, current_user.id, "bulk_move", None, f"Moved {len(files)} files to folder {folder_id or 'root'}")
+    background_tasks.add_task(log_activity, current_user.id, "bulk_move", None, f"Moved {len(files)} files to folder {folder_id or 'root'}")
     return {"message": f"{len(files)} files moved", "count": len(files)}
 
 
 @router.get("/shares", response_model=list[ShareLinkRead])
 def list_my_share_links(
+    limit: int = Query(100, ge=1, le=500, description="Maximum number of links to return"),
+    offset: int = Query(0, ge=0, description="Number of links to skip"),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
 ) -> list[models.ShareLink]:
-    """Get all share links created by the current user"""
-    shares = (
-        db.query(models.ShareLink)
-        .filter(models.ShareLink.created_by_id == current_user.id)
+    """Get share links created by the current user, newest expiry first"""
+    shares = db.scalars(
+        select(models.ShareLink)
+        .options(raiseload("*"))
+        .where(models.ShareLink.created_by_id == current_user.id)
         .order_by(models.ShareLink.expires_at.desc())
-        .all()
-    )
+        .offset(offset)
+        .limit(limit)
+    ).all()
     return shares
 
 
@@ -496,30 +720,38 @@ def use_share_link(
     storage: S3StorageService = Depends(get_storage_service),
 ) -> dict:
     """Use a share link to get file download URL"""
-    share = db.query(models.ShareLink).filter(models.ShareLink.token == token).first()
-    if not share:
-        raise HTTPException(status_code=404, detail="Invalid link")
-    if share.expires_at < datetime.utcnow():
-        raise HTTPException(status_code=410, detail="Link expired")
-    file_obj = db.get(models.FileAsset, share.file_id)
-    if not file_obj or file_obj.is_trashed:
-        raise HTTPException(status_code=404, detail="File missing")
-    url = storage.presigned_download(file_obj.s3_key)
-    return {"filename": file_obj.filename, "url": url}
+    # One JOINed query covering token, expiry, and the file itself, with
+    # a uniform 404 for every miss so responses don't leak whether a
+    # token ever existed (invalid vs expired vs trashed file).
+    row = db.execute(
+        select(models.FileAsset.filename, models.FileAsset.s3_key)
+        .join(models.ShareLink, models.ShareLink.file_id == models.FileAsset.id)
+        .where(
+            models.ShareLink.token == token,
+            models.ShareLink.expires_at >= datetime.utcnow(),
+            models.FileAsset.is_trashed == False,
+        )
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Invalid or expired link")
+    url = storage.presigned_download(row.s3_key)
+    return {"filename": row.filename, "url": url}
 
 
 @router.get("/activity", response_model=list[ActivityLogRead])
 def get_activity_log(
-    limit: int = Query(50, description="Number of activities to return"),
+    limit: int = Query(50, ge=1, le=500, description="Number of activities to return"),
+    offset: int = Query(0, ge=0, description="Number of activities to skip"),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
 ) -> list[models.ActivityLog]:
     """Get user activity log"""
-    activities = (
-        db.query(models.ActivityLog)
-        .filter(models.ActivityLog.user_id == current_user.id)
+    activities = db.scalars(
+        select(models.ActivityLog)
+        .options(raiseload("*"))
+        .where(models.ActivityLog.user_id == current_user.id)
         .order_by(models.ActivityLog.created_at.desc())
+        .offset(offset)
         .limit(limit)
-        .all()
-    )
+    ).all()
     return activities
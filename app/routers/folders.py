@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session, raiseload
 
 from app import models
 from app.auth import get_current_active_user
@@ -13,22 +14,52 @@ router = APIRouter(prefix="/folders", tags=["Folders"])
 @router.get("/", response_model=list[FolderRead])
 def list_folders(
     parent_id: int | None = None,
+    include_counts: bool = Query(False, description="Include non-trashed file counts per folder"),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
-) -> list[models.Folder]:
+):
     """List folders, optionally filtered by parent"""
-    query = db.query(models.Folder).filter(models.Folder.owner_id == current_user.id)
-    
+    # raiseload: any lazy relationship touch on the listed folders is a
+    # bug (hidden N+1), so make it raise instead.
+    query = (
+        select(models.Folder)
+        .options(raiseload("*"))
+        .where(models.Folder.owner_id == current_user.id)
+    )
+
     if parent_id is None:
-        query = query.filter(models.Folder.parent_id.is_(None))
+        query = query.where(models.Folder.parent_id.is_(None))
     else:
         # Verify parent belongs to user
         parent = db.get(models.Folder, parent_id)
         if not parent or parent.owner_id != current_user.id:
             raise HTTPException(status_code=404, detail="Parent folder not found")
-        query = query.filter(models.Folder.parent_id == parent_id)
-    
-    return query.order_by(models.Folder.name.asc()).all()
+        query = query.where(models.Folder.parent_id == parent_id)
+
+    query = query.order_by(models.Folder.name.asc())
+
+    if not include_counts:
+        return db.scalars(query).all()
+
+    # Counts via one grouped LEFT JOIN instead of a COUNT query per
+    # folder ("n items" badges would otherwise be N+1).
+    rows = db.execute(
+        query.add_columns(func.count(models.FileAsset.id))
+        .outerjoin(
+            models.FileAsset,
+            and_(
+                models.FileAsset.folder_id == models.Folder.id,
+                models.FileAsset.is_trashed == False,
+            ),
+        )
+        .group_by(models.Folder.id)
+    ).all()
+    result = []
+    for folder, file_count in rows:
+        item = FolderRead.model_validate(folder)
+        item.file_count = file_count
+        result.append(item)
+    return result
 
 
 @router.post("/", response_model=FolderRead, status_code=201)
@@ -45,12 +76,14 @@ def create_folder(
             raise HTTPException(status_code=404, detail="Parent folder not found")
     
     # Check for duplicate name in same parent
-    existing = db.query(models.Folder).filter(
-        models.Folder.owner_id == current_user.id,
-        models.Folder.name == folder.name,
-        models.Folder.parent_id == folder.parent_id
+    existing = db.scalars(
+        select(models.Folder).where(
+            models.Folder.owner_id == current_user.id,
+            models.Folder.name == folder.name,
+            models.Folder.parent_id == folder.parent_id,
+        )
     ).first()
-    
+
     if existing:
         raise HTTPException(status_code=400, detail="Folder with this name already exists")
     
@@ -76,20 +109,24 @@ def delete_folder(
     if not folder or folder.owner_id != current_user.id:
         raise HTTPException(status_code=404, detail="Folder not found")
     
-    # Check if folder has files
-    file_count = db.query(models.FileAsset).filter(
-        models.FileAsset.folder_id == folder_id,
-        models.FileAsset.is_trashed == False
-    ).count()
-    
+    # Both emptiness checks in one round trip via scalar subqueries
+    file_count, subfolder_count = db.execute(
+        select(
+            select(func.count(models.FileAsset.id))
+            .where(
+                models.FileAsset.folder_id == folder_id,
+                models.FileAsset.is_trashed == False,
+            )
+            .scalar_subquery(),
+            select(func.count(models.Folder.id))
+            .where(models.Folder.parent_id == folder_id)
+            .scalar_subquery(),
+        )
+    ).one()
+
     if file_count > 0:
         raise HTTPException(status_code=400, detail="Folder is not empty. Move or delete files first.")
-    
-    # Check if folder has subfolders
-    subfolder_count = db.query(models.Folder).filter(
-        models.Folder.parent_id == folder_id
-    ).count()
-    
+
     if subfolder_count > 0:
         raise HTTPException(status_code=400, detail="Folder has subfolders. Delete them first.")
     
@@ -113,13 +150,15 @@ def update_folder(
     
     if name:
         # Check for duplicate name
-        existing = db.query(models.Folder).filter(
-            models.Folder.owner_id == current_user.id,
-            models.Folder.name == name,
-            models.Folder.parent_id == folder.parent_id,
-            models.Folder.id != folder_id
+        existing = db.scalars(
+            select(models.Folder).where(
+                models.Folder.owner_id == current_user.id,
+                models.Folder.name == name,
+                models.Folder.parent_id == folder.parent_id,
+                models.Folder.id != folder_id,
+            )
         ).first()
-        
+
         if existing:
             raise HTTPException(status_code=400, detail="Folder with this name already exists")
         
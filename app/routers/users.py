@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app import models
@@ -8,8 +9,14 @@ from app.auth import (
     authenticate_user,
     create_access_token,
     get_current_active_user,
+    get_optional_user,
     get_password_hash,
+    get_token_from_request,
     get_user_by_email,
+    invalidate_jwt,
+    invalidate_user,
+    login_throttled,
+    record_login_attempt,
 )
 from app.database import get_db
 from app.schemas import Token, UserCreate, UserRead
@@ -21,7 +28,7 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 def register_user(payload: UserCreate, db: Session = Depends(get_db)) -> models.User:
     if get_user_by_email(db, payload.email):
         raise HTTPException(status_code=400, detail="Email already registered")
-    first_user = db.query(models.User).count() == 0
+    first_user = db.scalar(select(func.count(models.User.id))) == 0
     user = models.User(
         email=payload.email,
         full_name=payload.full_name,
@@ -40,10 +47,17 @@ def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db),
 ):
+    client_ip = request.client.host if request.client else ""
+    if login_throttled(form_data.username, client_ip):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts, try again later",
+        )
     user = authenticate_user(db, form_data.username, form_data.password)
+    record_login_attempt(form_data.username, client_ip, success=user is not None)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
-    token = create_access_token(subject=user.email)
+    token = create_access_token(subject=str(user.id))
     
     # Create response with token
     response = JSONResponse(content={"access_token": token, "token_type": "bearer"})
@@ -61,6 +75,24 @@ def login(
     return response
 
 
+@router.post("/logout")
+async def logout(
+    request: Request,
+    current_user: models.User | None = Depends(get_optional_user),
+):
+    # Evict the token and user from the auth caches so a logged-out
+    # session cannot keep riding a cached payload until its TTL runs out.
+    token = await get_token_from_request(request)
+    if token:
+        invalidate_jwt(token)
+    if current_user:
+        invalidate_user(current_user)
+
+    response = JSONResponse(content={"message": "Logged out"})
+    response.delete_cookie("access_token")
+    return response
+
+
 @router.get("/me", response_model=UserRead)
 def read_current_user(current_user: models.User = Depends(get_current_active_user)) -> models.User:
     return current_user
@@ -44,6 +44,7 @@ class FileRead(FileBase):
     folder_id: int | None = None
     is_trashed: bool = False
     is_favorite: bool = False
+    url: str | None = None
 
     class Config:
         from_attributes = True
@@ -68,6 +69,7 @@ class FolderRead(BaseModel):
     name: str
     parent_id: int | None = None
     created_at: datetime
+    file_count: int | None = None
 
     class Config:
         from_attributes = True
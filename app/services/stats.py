@@ -1,19 +1,55 @@
-from sqlalchemy import func
+import threading
+
+from cachetools import TTLCache
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app import models
 
+# Cache-aside for the dashboard aggregates: they scan users and files,
+# and rarely change between admin page hits. Uploads and deletes call
+# invalidate_summary() for tighter freshness than the TTL alone.
+_summary_cache: TTLCache = TTLCache(maxsize=1, ttl=30)
+_summary_lock = threading.Lock()
+_SUMMARY_KEY = "admin_summary"
+
+
+def invalidate_summary() -> None:
+    """Drop the cached summary after a write that changes the totals."""
+    with _summary_lock:
+        _summary_cache.pop(_SUMMARY_KEY, None)
+
 
 def admin_summary(db: Session) -> dict:
-    total_users = db.query(func.count(models.User.id)).scalar() or 0
-    total_files = db.query(func.count(models.FileAsset.id)).scalar() or 0
-    total_bytes = db.query(func.coalesce(func.sum(models.FileAsset.size), 0)).scalar() or 0
-    top_users = (
-        db.query(models.User.full_name, models.User.email, models.User.total_bytes)
+    with _summary_lock:
+        cached = _summary_cache.get(_SUMMARY_KEY)
+    if cached is not None:
+        return cached
+    result = _compute_summary(db)
+    with _summary_lock:
+        _summary_cache[_SUMMARY_KEY] = result
+    return result
+
+
+def _compute_summary(db: Session) -> dict:
+    # Three scalar subqueries in one statement: each aggregate scans its
+    # own table directly, with no users LEFT JOIN files fan-out inflating
+    # the row count before the aggregation. top_users stays its own query
+    # since it needs an ORDER BY ... LIMIT of its own.
+    total_users, total_files, total_bytes = db.execute(
+        select(
+            select(func.count(models.User.id)).scalar_subquery(),
+            select(func.count(models.FileAsset.id)).scalar_subquery(),
+            select(
+                func.coalesce(func.sum(models.FileAsset.size), 0)
+            ).scalar_subquery(),
+        )
+    ).one()
+    top_users = db.execute(
+        select(models.User.full_name, models.User.email, models.User.total_bytes)
         .order_by(models.User.total_bytes.desc())
         .limit(5)
-        .all()
-    )
+    ).all()
     return {
         "total_users": total_users,
         "total_files": total_files,
@@ -23,4 +59,3 @@ def admin_summary(db: Session) -> dict:
             for row in top_users
         ],
     }
-